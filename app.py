@@ -1,9 +1,11 @@
-from flask import Flask, render_template, request, jsonify, send_file
-from sec_downloader import download_10k
+from flask import Flask, Response, render_template, request, jsonify, send_file, url_for
+from sec_downloader import iter_downloads
+from archive import iter_zip, next_files, filing_entries
+from jobs import JOBS_ENABLED, get_job_manager
+from filing_cache import get_filing_cache
+from metrics import get_metrics
 import re
-import os
-import zipfile
-from io import BytesIO
+import shutil
 import tempfile
 import logging
 from flask_cors import CORS
@@ -19,6 +21,9 @@ logger = logging.getLogger(__name__)
 app = Flask(__name__)
 CORS(app)  # Enable CORS for Vercel deployment
 
+MAX_TICKERS = 5  # Reduced max tickers for serverless
+MAX_JOB_TICKERS = 50  # Jobs run in the background, so no gateway timeout applies
+
 # Error handlers for Vercel
 @app.errorhandler(404)
 def not_found_error(error):
@@ -32,6 +37,39 @@ def internal_error(error):
 def gateway_timeout_error(error):
     return jsonify({'error': 'Request timed out. Please try downloading fewer reports at once.'}), 504
 
+def _cleanup(temp_dir):
+    try:
+        shutil.rmtree(temp_dir)
+    except Exception as e:
+        logger.error(f"Error cleaning up temporary files: {str(e)}")
+
+def _validate_request(data, max_tickers):
+    """Return (email, tickers, years, error) for a download request body"""
+    email = data.get('email')
+    tickers = data.get('tickers', [])
+    years = data.get('years', [])
+
+    # Input validation
+    if not email or not re.match(r"[^@]+@[^@]+\.[^@]+", email):
+        return None, None, None, 'Please provide a valid email address'
+
+    if not tickers:
+        return None, None, None, 'Please provide at least one ticker symbol'
+
+    if len(tickers) > max_tickers:
+        return None, None, None, f'Maximum {max_tickers} ticker symbols allowed in one request'
+
+    if not years:
+        return None, None, None, 'Please select at least one year'
+
+    # Convert years to integers
+    try:
+        years = list(dict.fromkeys(int(year) for year in years))
+    except ValueError:
+        return None, None, None, 'Invalid year format'
+
+    return email, tickers, years, None
+
 @app.route('/')
 def index():
     return render_template('index.html')
@@ -45,89 +83,116 @@ def download():
             
         logger.info(f"Received request data: {data}")
         
-        email = data.get('email')
-        tickers = data.get('tickers', [])
-        years = data.get('years', [])
-        
-        # Input validation
-        if not email or not re.match(r"[^@]+@[^@]+\.[^@]+", email):
-            return jsonify({'error': 'Please provide a valid email address'}), 400
-        
-        if not tickers:
-            return jsonify({'error': 'Please provide at least one ticker symbol'}), 400
-            
-        if len(tickers) > 5:  # Reduced max tickers for serverless
-            return jsonify({'error': 'Maximum 5 ticker symbols allowed in one request'}), 400
+        email, tickers, years, error = _validate_request(data, MAX_TICKERS)
+        if error:
+            return jsonify({'error': error}), 400
 
-        if not years:
-            return jsonify({'error': 'Please select at least one year'}), 400
+        # Give each request its own directory in /tmp (Vercel) so concurrent
+        # downloads never share or delete each other's files
+        temp_dir = tempfile.mkdtemp(prefix='sec_downloads_', dir='/tmp')
 
-        # Convert years to integers
-        try:
-            years = [int(year) for year in years]
-        except ValueError:
-            return jsonify({'error': 'Invalid year format'}), 400
-
-        # Create a temporary directory in /tmp for Vercel
-        temp_dir = os.path.join('/tmp', 'sec_downloads')
-        os.makedirs(temp_dir, exist_ok=True)
+        logger.info(f"Downloading data for {', '.join(tickers)}")
+        events = iter_downloads(tickers, email, base_dir=temp_dir, years=years)
+        errors = []
 
+        # Hold the response until the first filing lands so a batch where
+        # nothing downloads can still be answered with a JSON error
         try:
-            downloaded_files = []
-            for ticker in tickers:
-                try:
-                    logger.info(f"Downloading data for {ticker}")
-                    success = download_10k(ticker, email, base_dir=temp_dir, years=years)
-                    if not success:
-                        return jsonify({'error': f'Failed to download data for {ticker}. Please verify the ticker symbol is correct.'}), 400
-                except Exception as e:
-                    logger.error(f"Error processing {ticker}: {str(e)}")
-                    return jsonify({'error': str(e)}), 400
-
-            # Create zip file in memory
-            memory_file = BytesIO()
-            with zipfile.ZipFile(memory_file, 'w', zipfile.ZIP_DEFLATED) as zf:
-                for root, dirs, files in os.walk(temp_dir):
-                    for file in files:
-                        file_path = os.path.join(root, file)
-                        arcname = os.path.relpath(file_path, temp_dir)
-                        try:
-                            zf.write(file_path, arcname)
-                            downloaded_files.append(arcname)
-                        except Exception as e:
-                            logger.error(f"Error adding file to zip: {str(e)}")
-                            return jsonify({'error': 'Error creating zip file'}), 500
-
-            if not downloaded_files:
-                return jsonify({'error': 'No files were downloaded'}), 400
-
-            memory_file.seek(0)
-            logger.info(f"Successfully created zip file with {len(downloaded_files)} files")
-
-            response = send_file(
-                memory_file,
-                mimetype='application/zip',
-                as_attachment=True,
-                download_name='sec_filings.zip'
-            )
-            
-            # Add CORS headers
-            response.headers.add('Access-Control-Allow-Origin', '*')
-            return response
-
+            first_files = next_files(events, errors)
         except Exception as e:
             logger.error(f"Server error: {str(e)}")
+            _cleanup(temp_dir)
             return jsonify({'error': str(e)}), 500
-        finally:
-            # Cleanup temporary files
+
+        if not first_files:
+            _cleanup(temp_dir)
+            message = errors[0] if errors else 'No files were downloaded'
+            return jsonify({'error': f'Failed to download data for {message}'}), 400
+
+        def generate():
             try:
-                import shutil
-                shutil.rmtree(temp_dir)
+                yield from iter_zip(filing_entries(first_files, events, errors, temp_dir))
+                logger.info("Finished streaming zip file")
             except Exception as e:
-                logger.error(f"Error cleaning up temporary files: {str(e)}")
+                # Headers are already sent; all we can do is cut the stream
+                logger.error(f"Error streaming zip file: {str(e)}")
+                raise
+            finally:
+                events.close()
+                _cleanup(temp_dir)
+
+        response = Response(generate(), mimetype='application/zip')
+        response.headers['Content-Disposition'] = 'attachment; filename=sec_filings.zip'
+
+        # Add CORS headers
+        response.headers.add('Access-Control-Allow-Origin', '*')
+        return response
 
     except json.JSONDecodeError:
         return jsonify({'error': 'Invalid JSON in request'}), 400
     except Exception as e:
         logger.error(f"Unexpected error: {str(e)}")
         return jsonify({'error': 'An unexpected error occurred'}), 500
+
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    # Per-process figures: each worker reports its own share of the traffic
+    snapshot = get_metrics().snapshot()
+    snapshot['filing_cache'] = get_filing_cache().stats()
+    return jsonify(snapshot)
+
+@app.route('/jobs', methods=['POST'])
+def create_job():
+    if not JOBS_ENABLED:
+        return jsonify({'error': 'Background jobs are not available on this deployment; use /download'}), 501
+
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify({'error': 'Invalid request data'}), 400
+
+        logger.info(f"Received job request data: {data}")
+
+        email, tickers, years, error = _validate_request(data, MAX_JOB_TICKERS)
+        if error:
+            return jsonify({'error': error}), 400
+
+        job_id = get_job_manager().create(tickers, email, years)
+        return jsonify({
+            'job_id': job_id,
+            'status_url': url_for('job_status', job_id=job_id),
+            'result_url': url_for('job_result', job_id=job_id),
+        }), 202
+
+    except Exception as e:
+        logger.error(f"Unexpected error: {str(e)}")
+        return jsonify({'error': 'An unexpected error occurred'}), 500
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    state = get_job_manager().get(job_id)
+    if state is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(state)
+
+@app.route('/jobs/<job_id>/result', methods=['GET'])
+def job_result(job_id):
+    manager = get_job_manager()
+    state = manager.get(job_id)
+    if state is None:
+        return jsonify({'error': 'Job not found'}), 404
+    if state['status'] == 'failed':
+        return jsonify({'error': state['error']}), 400
+    if state['status'] != 'complete':
+        return jsonify({'error': f"Job is {state['status']}"}), 409
+
+    response = send_file(
+        manager.result_path(job_id),
+        mimetype='application/zip',
+        as_attachment=True,
+        download_name='sec_filings.zip'
+    )
+
+    # Add CORS headers
+    response.headers.add('Access-Control-Allow-Origin', '*')
+    return response
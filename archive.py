@@ -0,0 +1,94 @@
+import os
+import time
+import zipfile
+import logging
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+
+
+class _StreamBuffer:
+    """Write-only sink that hands zipfile output back to a generator"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def iter_zip(entries):
+    """Yield a ZIP archive of (file_path, arcname) entries as it is built
+
+    Without a seekable target zipfile writes data descriptors after each
+    member, so bytes can be sent as soon as they are compressed and only
+    one chunk of one file is held in memory at a time. entries may be a
+    generator; members are added as it produces them.
+    """
+    buffer = _StreamBuffer()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as zf:
+        for file_path, arcname in entries:
+            zinfo = zipfile.ZipInfo(arcname, time.localtime(os.path.getmtime(file_path))[:6])
+            zinfo.compress_type = zipfile.ZIP_DEFLATED
+            # Declare the size up front so zipfile picks zip64 when needed
+            zinfo.file_size = os.path.getsize(file_path)
+            # Only count compression time, not time the consumer holds a chunk
+            elapsed = 0
+            with open(file_path, 'rb') as src, zf.open(zinfo, 'w') as dest:
+                while True:
+                    start = time.perf_counter()
+                    chunk = src.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    dest.write(chunk)
+                    data = buffer.drain()
+                    elapsed += time.perf_counter() - start
+                    if data:
+                        yield data
+            metrics.record('archive', elapsed)
+            yield buffer.drain()
+    # Central directory is written on close
+    yield buffer.drain()
+
+
+def next_files(events, errors):
+    """Advance the download events to the next finished filing"""
+    for ticker, files, error in events:
+        if error:
+            errors.append(f"{ticker}: {error}")
+        if files:
+            return files
+    return None
+
+
+def filing_entries(files, events, errors, work_dir):
+    """Yield (path, arcname) for each filing as it finishes downloading"""
+    count = 0
+    while files:
+        for file_path in files:
+            yield file_path, os.path.relpath(file_path, work_dir)
+            # Already compressed into the stream, so free the disk space
+            os.remove(file_path)
+            count += 1
+        files = next_files(events, errors)
+
+    if errors:
+        # Partial batch: tell the user which tickers or filings are missing
+        errors_path = os.path.join(work_dir, 'download_errors.txt')
+        with open(errors_path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(errors) + '\n')
+        yield errors_path, 'download_errors.txt'
+
+    logger.info(f"Added {count} files to zip stream")
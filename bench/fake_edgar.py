@@ -0,0 +1,260 @@
+"""Local stand-in for the EDGAR endpoints used by sec_downloader
+
+Serves company_tickers.json, submissions JSON (with a paginated history
+file), quarterly full-index form.idx files and full-submission .txt
+filings. Files under --fixtures that mirror
+the request path (e.g. fixtures/submissions/CIK0000320193.json) are served
+as recorded; anything else is synthesised at a realistic size. Point the
+app at it with:
+
+    SEC_WWW_URL=http://127.0.0.1:8001 SEC_DATA_URL=http://127.0.0.1:8001 python app.py
+"""
+import argparse
+import json
+import os
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CHUNK_SIZE = 64 * 1024
+FIRST_CIK = 1000001
+# Filings from before this year are moved to the paginated history file,
+# like the real submissions API does once "recent" fills up
+RECENT_FROM = 2016
+
+_SUBMISSIONS_PATH = re.compile(r'/submissions/CIK(\d{10})(-submissions-001)?\.json')
+_ARCHIVE_PATH = re.compile(r'/Archives/edgar/data/(\d+)/(\d{18})/([\d-]+)\.txt')
+_FORM_INDEX_PATH = re.compile(r'/Archives/edgar/full-index/(\d{4})/QTR([1-4])/form\.idx')
+
+
+class FakeEdgar:
+    """Synthetic EDGAR data plus the knobs the benchmarks turn"""
+
+    def __init__(self, companies=50, first_year=2000, last_year=2024, filing_size=4 * 1024 * 1024,
+                 latency=0.0, throttle_rate=0.0, retry_after=1, fixtures=None):
+        self.companies = companies
+        self.first_year = first_year
+        self.last_year = last_year
+        self.latency = latency
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.fixtures = fixtures
+        self.counts = {}
+        self._lock = threading.Lock()
+        self._body = _primary_document(filing_size)
+
+    def count(self, kind):
+        with self._lock:
+            self.counts[kind] = self.counts.get(kind, 0) + 1
+
+    def tickers(self):
+        return {
+            str(i): {'cik_str': FIRST_CIK + i, 'ticker': ticker(i), 'title': f'Benchmark Company {i}'}
+            for i in range(self.companies)
+        }
+
+    def submissions(self, cik, page):
+        filings = []
+        for year in range(self.last_year, self.first_year - 1, -1):
+            filings.append(('10-K', f'{year}-02-15', f'{year - 1}-12-31', accession(cik, year, 1)))
+            filings.append(('8-K', f'{year}-05-01', '', accession(cik, year, 2)))
+
+        if page:
+            filings = [row for row in filings if int(row[1][:4]) < RECENT_FROM]
+        else:
+            filings = [row for row in filings if int(row[1][:4]) >= RECENT_FROM]
+
+        columns = {
+            'form': [row[0] for row in filings],
+            'filingDate': [row[1] for row in filings],
+            'reportDate': [row[2] for row in filings],
+            'accessionNumber': [row[3] for row in filings],
+        }
+        if page:
+            return columns
+
+        history = []
+        if self.first_year < RECENT_FROM:
+            history.append({'name': f'CIK{cik:010d}-submissions-001.json'})
+        return {
+            'cik': str(cik),
+            'name': f'Benchmark Company {cik - FIRST_CIK}',
+            'filings': {'recent': columns, 'files': history},
+        }
+
+    def form_index(self, year, quarter):
+        lines = [
+            'Description:           Master Index of EDGAR Dissemination Feed by Form Type',
+            '',
+            'Form Type   Company Name                                                  CIK         Date Filed  File Name',
+            '-' * 140,
+        ]
+        if self.first_year <= year <= self.last_year:
+            # Synthetic 10-Ks are filed in February and 8-Ks in May
+            for form, month, n in (('10-K', 2, 1), ('8-K', 5, 2)):
+                if (month - 1) // 3 + 1 != quarter:
+                    continue
+                for i in range(self.companies):
+                    cik = FIRST_CIK + i
+                    lines.append(f'{form:<12}{"Benchmark Company " + str(i):<62}{cik:<12}'
+                                 f'{year}-{month:02d}-15  edgar/data/{cik}/{accession(cik, year, n)}.txt')
+        return ('\n'.join(lines) + '\n').encode()
+
+    def filing(self, accession_number):
+        header = (
+            f'<SEC-DOCUMENT>{accession_number}.txt\n<SEC-HEADER>{accession_number}.hdr.sgml\n'
+            f'ACCESSION NUMBER:\t\t{accession_number}\nCONFORMED SUBMISSION TYPE:\t10-K\n'
+            f'</SEC-HEADER>\n<DOCUMENT>\n<TYPE>10-K\n<SEQUENCE>1\n<FILENAME>form10-k.htm\n'
+            f'<DESCRIPTION>10-K\n<TEXT>\n<XBRL>\n'
+        ).encode()
+        footer = (
+            b'\n</XBRL>\n</TEXT>\n</DOCUMENT>\n'
+            b'<DOCUMENT>\n<TYPE>EX-21.1\n<SEQUENCE>2\n<FILENAME>ex21.htm\n<TEXT>\n'
+            b'<html><body><p>Subsidiaries of the registrant</p></body></html>\n</TEXT>\n</DOCUMENT>\n'
+            b'<DOCUMENT>\n<TYPE>GRAPHIC\n<SEQUENCE>3\n<FILENAME>logo.jpg\n<TEXT>\nbegin 644 logo.jpg\n'
+            + b'M' + b'A' * 60 + b'\nend\n</TEXT>\n</DOCUMENT>\n</SEC-DOCUMENT>\n'
+        )
+        return header, self._body, footer
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive, so connection pooling shows up
+
+    def do_GET(self):
+        edgar = self.server.edgar
+        path = self.path.split('?')[0]
+
+        if edgar.latency:
+            time.sleep(edgar.latency)
+
+        if path == '/_stats':
+            return self._send_json(edgar.counts)
+
+        if edgar.throttle_rate and random.random() < edgar.throttle_rate:
+            edgar.count('throttled')
+            return self._send(429, b'Too Many Requests', headers={'Retry-After': str(edgar.retry_after)})
+
+        if edgar.fixtures and '..' not in path:
+            fixture = os.path.join(edgar.fixtures, path.lstrip('/'))
+            if os.path.isfile(fixture):
+                edgar.count('fixture')
+                return self._send_file(fixture)
+
+        if path == '/files/company_tickers.json':
+            edgar.count('tickers')
+            return self._send_json(edgar.tickers(), etag='"tickers-v1"')
+
+        match = _SUBMISSIONS_PATH.fullmatch(path)
+        if match:
+            cik = int(match.group(1))
+            if not FIRST_CIK <= cik < FIRST_CIK + edgar.companies:
+                return self._send(404, b'Not Found')
+            edgar.count('submissions')
+            return self._send_json(edgar.submissions(cik, bool(match.group(2))), etag=f'"{cik}-v1"')
+
+        match = _FORM_INDEX_PATH.fullmatch(path)
+        if match:
+            edgar.count('form_index')
+            return self._send(200, edgar.form_index(int(match.group(1)), int(match.group(2))))
+
+        match = _ARCHIVE_PATH.fullmatch(path)
+        if match:
+            edgar.count('filings')
+            return self._send_parts(edgar.filing(match.group(3)))
+
+        self._send(404, b'Not Found')
+
+    def _send(self, status, body, content_type='text/plain', headers=None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, data, etag=None):
+        if etag and self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        self._send(200, json.dumps(data).encode(), 'application/json', {'ETag': etag} if etag else None)
+
+    def _send_file(self, path):
+        with open(path, 'rb') as f:
+            self._send(200, f.read(), 'application/json' if path.endswith('.json') else 'text/plain')
+
+    def _send_parts(self, parts):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain')
+        self.send_header('Content-Length', str(sum(len(part) for part in parts)))
+        self.end_headers()
+        for part in parts:
+            for i in range(0, len(part), CHUNK_SIZE):
+                self.wfile.write(part[i:i + CHUNK_SIZE])
+
+    def log_message(self, format, *args):
+        pass
+
+
+def ticker(i):
+    return f'BM{i:04d}'
+
+
+def accession(cik, year, n):
+    return f'{cik:010d}-{year % 100:02d}-{n:06d}'
+
+
+def _primary_document(size):
+    # Repetitive but HTML-shaped, roughly what a large 10-K looks like
+    row = (b'<tr><td style="font-family:Times New Roman">Net revenue</td>'
+           b'<td style="text-align:right">1,234,567</td></tr>\n')
+    rows = row * (max(0, size - 200) // len(row))
+    return b'<html><head><title>Form 10-K</title></head><body><table>\n' + rows + b'</table></body></html>'
+
+
+def make_server(edgar, host='127.0.0.1', port=0):
+    server = ThreadingHTTPServer((host, port), _Handler)
+    server.daemon_threads = True
+    server.edgar = edgar
+    return server
+
+
+def start_server(edgar, host='127.0.0.1', port=0):
+    """Serve edgar on a background thread and return the server"""
+    server = make_server(edgar, host, port)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8001)
+    parser.add_argument('--companies', type=int, default=50)
+    parser.add_argument('--filing-size', type=int, default=4 * 1024 * 1024,
+                        help='bytes in each primary document (default 4 MB)')
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to every response')
+    parser.add_argument('--throttle-rate', type=float, default=0.0,
+                        help='fraction of requests answered with 429')
+    parser.add_argument('--retry-after', type=int, default=1)
+    parser.add_argument('--fixtures', help='directory of recorded responses laid out by URL path')
+    args = parser.parse_args()
+
+    edgar = FakeEdgar(companies=args.companies, filing_size=args.filing_size, latency=args.latency,
+                      throttle_rate=args.throttle_rate, retry_after=args.retry_after,
+                      fixtures=args.fixtures)
+    server = make_server(edgar, args.host, args.port)
+    print(f"Fake EDGAR listening on http://{args.host}:{server.server_port}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
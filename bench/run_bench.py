@@ -0,0 +1,222 @@
+"""Offline benchmark of the /download pipeline against bench/fake_edgar.py
+
+Starts a fake EDGAR server in a subprocess (so its memory is not counted),
+points the app at it and drives /download with representative batches.
+Reports throughput, p50/p99 latency and time to first byte, per-batch peak
+RSS (Linux only) and the per-stage timings that /metrics exposes. Example:
+
+    python bench/run_bench.py --batch 1x1 --batch 5x5 --requests 10 --latency 0.05
+"""
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from fake_edgar import ticker
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+# Enough synthetic companies that cold runs never revisit one
+COMPANIES = 1000
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--batch', action='append', metavar='TICKERSxYEARS',
+                        help='batch shape, repeatable (default: 1x1, 5x1, 5x5)')
+    parser.add_argument('--requests', type=int, default=5, help='requests per batch shape')
+    parser.add_argument('--concurrency', type=int, default=1, help='concurrent /download requests')
+    parser.add_argument('--warm', action='store_true',
+                        help='reuse tickers so the caches serve repeat requests')
+    parser.add_argument('--rate-limit', type=float, default=10, help='client requests per second')
+    parser.add_argument('--base-url', help='use an already running fake EDGAR instead of starting one')
+    parser.add_argument('--latency', type=float, default=0.05, help='seconds added to every response')
+    parser.add_argument('--throttle-rate', type=float, default=0.0,
+                        help='fraction of requests answered with 429')
+    parser.add_argument('--filing-size', type=int, default=4 * 1024 * 1024)
+    parser.add_argument('--fixtures', help='recorded responses for the fake server')
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    return parser.parse_args()
+
+
+def start_fake_edgar(args):
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        port = s.getsockname()[1]
+
+    command = [sys.executable, os.path.join(BENCH_DIR, 'fake_edgar.py'), '--port', str(port),
+               '--companies', str(COMPANIES),
+               '--latency', str(args.latency), '--throttle-rate', str(args.throttle_rate),
+               '--filing-size', str(args.filing_size)]
+    if args.fixtures:
+        command += ['--fixtures', args.fixtures]
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL)
+
+    base_url = f'http://127.0.0.1:{port}'
+    for _ in range(100):
+        try:
+            urllib.request.urlopen(f'{base_url}/_stats').close()
+            return process, base_url
+        except OSError:
+            time.sleep(0.05)
+    process.kill()
+    raise RuntimeError('Fake EDGAR server did not start')
+
+
+def configure(args, base_url, work_dir):
+    # Module constants read the environment at import, so set it first
+    os.environ['SEC_WWW_URL'] = base_url
+    os.environ['SEC_DATA_URL'] = base_url
+    os.environ['SEC_RATE_LIMIT'] = str(args.rate_limit)
+
+    import filing_cache
+    import filing_index
+    import sec_client
+    import ticker_index
+
+    # Keep benchmark state out of the real /tmp caches
+    sec_client._client = sec_client.SECClient(
+        rate_limiter=sec_client.TokenBucket(args.rate_limit,
+                                            state_path=os.path.join(work_dir, 'rate.state')))
+    ticker_index._index = ticker_index.TickerIndex(path=os.path.join(work_dir, 'tickers.json'))
+    filing_index._index = filing_index.FilingIndex(index_dir=os.path.join(work_dir, 'index'))
+    filing_cache._cache = filing_cache.FilingCache(
+        cache_dir=os.path.join(work_dir, 'filings'),
+        max_bytes=filing_cache.MAX_BYTES if args.warm else 0)
+
+
+def reset_peak_rss():
+    """Restart the kernel's peak RSS counter; False where unsupported"""
+    # Linux only: writing 5 to clear_refs resets VmHWM for this process
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss_mb():
+    """Peak RSS since the last reset_peak_rss(), in MB"""
+    with open('/proc/self/status', 'r') as f:
+        for line in f:
+            if line.startswith('VmHWM:'):
+                return int(line.split()[1]) / 1024
+    return None
+
+
+def run_request(client, tickers, years):
+    start = time.perf_counter()
+    response = client.post('/download', json={
+        'email': 'bench@example.com', 'tickers': tickers, 'years': years,
+    }, buffered=False)
+    first_byte = None
+    size = 0
+    for chunk in response.response:
+        if first_byte is None:
+            first_byte = time.perf_counter() - start
+        size += len(chunk)
+    response.close()
+    return response.status_code, time.perf_counter() - start, first_byte or 0, size
+
+
+def run_batch(app, shape, args, offset):
+    from metrics import get_metrics, percentile
+
+    n_tickers, n_years = (int(n) for n in shape.lower().split('x'))
+    years = list(range(2024, 2024 - n_years, -1))
+    get_metrics().reset()
+    # ru_maxrss only ever grows, so later batches would report the peak of
+    # every batch before them; reset the high-water mark instead
+    track_rss = reset_peak_rss()
+
+    def one(i):
+        # Cold runs walk through fresh companies; warm runs repeat the first
+        base = 0 if args.warm else offset + i * n_tickers
+        tickers = [ticker((base + t) % COMPANIES) for t in range(n_tickers)]
+        return run_request(app.test_client(), tickers, years)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(one, range(args.requests)))
+    wall = time.perf_counter() - start
+
+    latencies = sorted(r[1] for r in results)
+    first_bytes = sorted(r[2] for r in results)
+    total_bytes = sum(r[3] for r in results)
+    return {
+        'batch': shape,
+        'requests': args.requests,
+        'failed': sum(1 for r in results if r[0] != 200),
+        'wall_s': wall,
+        'filings_per_s': args.requests * n_tickers * n_years / wall,
+        'mb_per_s': total_bytes / wall / 1e6,
+        'latency_p50_s': percentile(latencies, 50),
+        'latency_p99_s': percentile(latencies, 99),
+        'ttfb_p50_s': percentile(first_bytes, 50),
+        'peak_rss_mb': peak_rss_mb() if track_rss else None,
+        'metrics': get_metrics().snapshot(),
+    }
+
+
+def print_report(results):
+    print(f"{'batch':>6} {'reqs':>5} {'fail':>5} {'wall s':>8} {'filings/s':>10} {'MB/s':>7} "
+          f"{'p50 s':>7} {'p99 s':>7} {'ttfb s':>7} {'rss MB':>7}")
+    for r in results:
+        print(f"{r['batch']:>6} {r['requests']:>5} {r['failed']:>5} {r['wall_s']:>8.2f} "
+              f"{r['filings_per_s']:>10.2f} {r['mb_per_s']:>7.1f} {r['latency_p50_s']:>7.2f} "
+              f"{r['latency_p99_s']:>7.2f} {r['ttfb_p50_s']:>7.2f} {_format_mb(r['peak_rss_mb']):>7}")
+    for r in results:
+        print(f"\n{r['batch']} stages (s):")
+        for stage, stats in sorted(r['metrics']['stages'].items()):
+            print(f"  {stage:<18} n={stats['count']:<5} mean={stats['mean']:.4f} "
+                  f"p50={stats['p50']:.4f} p99={stats['p99']:.4f}")
+        print(f"  counters: {r['metrics']['counters']}")
+
+
+def _format_mb(value):
+    return 'n/a' if value is None else f'{value:.0f}'
+
+
+def main():
+    args = parse_args()
+    shapes = args.batch or ['1x1', '5x1', '5x5']
+
+    process = None
+    base_url = args.base_url
+    if not base_url:
+        process, base_url = start_fake_edgar(args)
+
+    try:
+        with tempfile.TemporaryDirectory(prefix='sec_bench_') as work_dir:
+            configure(args, base_url, work_dir)
+
+            import logging
+            from app import app
+            logging.getLogger().setLevel(logging.WARNING)
+
+            results = []
+            offset = 0
+            for shape in shapes:
+                results.append(run_batch(app, shape, args, offset))
+                offset += args.requests * int(shape.lower().split('x')[0])
+
+        if args.json:
+            print(json.dumps(results, indent=2))
+        else:
+            print_report(results)
+    finally:
+        if process:
+            process.terminate()
+            process.wait()
+
+
+if __name__ == '__main__':
+    main()
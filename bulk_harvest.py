@@ -0,0 +1,237 @@
+"""Bulk-harvest annual reports for many companies from EDGAR full-index files
+
+Reads each quarter's full-index/form.idx once to find every matching
+filing, then downloads them with bounded concurrency into a tree sharded
+by CIK:
+
+    OUT/<last two CIK digits>/<CIK>/<form>_<date>_<accession>_full.txt
+
+Completed filings are appended to OUT/manifest.jsonl, so re-running the
+same command after an interruption skips everything already done.
+
+    python bulk_harvest.py --email you@example.com --years 2022 2023 --out harvest
+    python bulk_harvest.py --email you@example.com --years 2023 --tickers AAPL MSFT --out harvest
+"""
+import argparse
+import datetime
+import json
+import logging
+import os
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from sec_client import SEC_WWW_URL, sec_get
+from sec_downloader import ANNUAL_FORMS, CHUNK_SIZE, download_filing
+from ticker_index import lookup_cik
+
+logger = logging.getLogger(__name__)
+
+FULL_INDEX_URL = f'{SEC_WWW_URL}/Archives/edgar/full-index'
+MANIFEST_FILE = 'manifest.jsonl'
+INDEX_DIR = '_index'
+MAX_WORKERS = 8
+# Filings queued ahead of the workers; keeps memory flat on huge runs
+QUEUE_PER_WORKER = 4
+LOG_EVERY = 100
+
+
+def quarters(years):
+    """Yield (year, quarter) pairs that have started, oldest first"""
+    today = datetime.date.today()
+    for year in sorted(years):
+        for quarter in range(1, 5):
+            if (year, quarter) <= (today.year, (today.month - 1) // 3 + 1):
+                yield year, quarter
+
+
+def fetch_form_index(year, quarter, email, index_dir):
+    """Return the local path of a quarter's form.idx, downloading if needed"""
+    path = os.path.join(index_dir, f'{year}-QTR{quarter}-form.idx')
+    today = datetime.date.today()
+    in_progress = (year, quarter) == (today.year, (today.month - 1) // 3 + 1)
+
+    # Closed quarters never change, so a saved copy is good forever
+    if os.path.exists(path) and not in_progress:
+        return path
+
+    url = f'{FULL_INDEX_URL}/{year}/QTR{quarter}/form.idx'
+    response = sec_get(url, email, stream=True)
+    try:
+        if response.status_code != 200:
+            error_msg = f"Failed to get {url}: {response.status_code}"
+            logger.error(error_msg)
+            raise Exception(error_msg)
+
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'wb') as f:
+            for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                f.write(chunk)
+        os.replace(tmp_path, path)
+    finally:
+        response.close()
+
+    return path
+
+
+def parse_form_index(path, forms, ciks=None):
+    """Yield (form, cik, filing_date, accession_number) rows from a form.idx
+
+    Rows are fixed-width columns of form type, company name, CIK, date filed
+    and file name, after a header that ends in a line of dashes.
+    """
+    with open(path, 'r', encoding='latin-1') as f:
+        for line in f:
+            if line.startswith('---'):
+                break
+
+        for line in f:
+            line = line.rstrip()
+            if not line:
+                continue
+            form = re.split(r'\s{2,}', line, maxsplit=1)[0]
+            if form not in forms:
+                continue
+            try:
+                cik, filing_date, file_name = line.rsplit(None, 3)[1:]
+            except ValueError:
+                logger.warning(f"Skipping malformed index line: {line}")
+                continue
+            if ciks and int(cik) not in ciks:
+                continue
+            accession_number = os.path.basename(file_name)[:-len('.txt')]
+            yield form, int(cik), filing_date, accession_number
+
+
+def load_manifest(path):
+    """Return the accession numbers already recorded as complete"""
+    done = set()
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    done.add(json.loads(line)['accession'])
+                except (ValueError, KeyError):
+                    # A line torn by a crash mid-write; that filing reruns
+                    continue
+    except FileNotFoundError:
+        pass
+    return done
+
+
+def harvest(years, email, out_dir, forms=ANNUAL_FORMS, ciks=None, exhibits=None,
+            max_workers=MAX_WORKERS):
+    """Download every matching filing for the given years into out_dir
+
+    Returns (downloaded, skipped, failed) counts. ciks limits the run to
+    those companies; by default every filer in the index is harvested.
+    """
+    index_dir = os.path.join(out_dir, INDEX_DIR)
+    os.makedirs(index_dir, exist_ok=True)
+    manifest_path = os.path.join(out_dir, MANIFEST_FILE)
+    done = load_manifest(manifest_path)
+    if done:
+        logger.info(f"Resuming: {len(done)} filings already harvested")
+
+    downloaded = skipped = failed = 0
+    started = time.time()
+    pool = ThreadPoolExecutor(max_workers=max_workers)
+    pending = {}
+    queued = set()
+
+    def collect():
+        nonlocal downloaded, failed
+        finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in finished:
+            form, cik, filing_date, accession_number = pending.pop(future)
+            try:
+                files = future.result()
+            except Exception as e:
+                logger.error(f"Failed {form} {accession_number} for CIK {cik}: {str(e)}")
+                failed += 1
+                continue
+            manifest.write(json.dumps({
+                'accession': accession_number,
+                'cik': cik,
+                'form': form,
+                'filing_date': filing_date,
+                'files': [os.path.relpath(path, out_dir) for path in files],
+            }) + '\n')
+            manifest.flush()
+            done.add(accession_number)
+            downloaded += 1
+            if downloaded % LOG_EVERY == 0:
+                rate = downloaded / (time.time() - started)
+                logger.info(f"Harvested {downloaded} filings ({rate:.1f}/s), {failed} failed")
+
+    try:
+        with open(manifest_path, 'a', encoding='utf-8') as manifest:
+            for year, quarter in quarters(years):
+                logger.info(f"Reading {year} QTR{quarter} form index")
+                index_path = fetch_form_index(year, quarter, email, index_dir)
+
+                for form, cik, filing_date, accession_number in parse_form_index(index_path, forms, ciks):
+                    if accession_number in done:
+                        skipped += 1
+                        continue
+                    # Co-registrants list the same filing once per CIK
+                    if accession_number in queued:
+                        continue
+                    queued.add(accession_number)
+
+                    while len(pending) >= max_workers * QUEUE_PER_WORKER:
+                        collect()
+
+                    shard_dir = os.path.join(out_dir, f'{cik % 100:02d}')
+                    os.makedirs(shard_dir, exist_ok=True)
+                    # Bypass the web app's filing cache: a backfill would evict
+                    # its hot entries and copy every filing through /tmp
+                    future = pool.submit(download_filing, str(cik), cik, form, filing_date,
+                                         accession_number, email, shard_dir, exhibits,
+                                         use_cache=False)
+                    pending[future] = (form, cik, filing_date, accession_number)
+
+            while pending:
+                collect()
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+    logger.info(f"Done: {downloaded} downloaded, {skipped} already harvested, {failed} failed")
+    return downloaded, skipped, failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--email', required=True, help='contact email sent to SEC in the User-Agent')
+    parser.add_argument('--years', type=int, nargs='+', required=True, help='filing years to harvest')
+    parser.add_argument('--out', default='sec_harvest', help='output directory (default: sec_harvest)')
+    parser.add_argument('--forms', nargs='+', default=ANNUAL_FORMS,
+                        help='form types to harvest (default: 10-K 20-F)')
+    parser.add_argument('--tickers', nargs='+', help='only harvest these tickers')
+    parser.add_argument('--ciks', type=int, nargs='+', help='only harvest these CIKs')
+    parser.add_argument('--exhibits', nargs='+', help='exhibit type prefixes to extract, e.g. EX-21')
+    parser.add_argument('--workers', type=int, default=MAX_WORKERS)
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    ciks = set(args.ciks or [])
+    for ticker in args.tickers or []:
+        cik = lookup_cik(ticker, args.email)
+        if not cik:
+            parser.error(f"Could not find CIK for {ticker}")
+        ciks.add(int(cik))
+
+    downloaded, skipped, failed = harvest(args.years, args.email, args.out, forms=args.forms,
+                                          ciks=ciks or None, exhibits=args.exhibits,
+                                          max_workers=args.workers)
+    # Non-zero so schedulers notice; a re-run retries only the failures
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,195 @@
+import gzip
+import os
+import shutil
+import threading
+import time
+import logging
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# Filings are immutable once accepted, so entries never need revalidating
+CACHE_DIR = os.path.join('/tmp', 'sec_filing_cache')
+# Vercel only gives us 512 MB of /tmp, leave room for work directories.
+# The budget covers the whole directory, shared by every worker process
+MAX_BYTES = int(os.environ.get('SEC_FILING_CACHE_MB', 256)) * 1024 * 1024
+# Store entries gzipped: smaller on disk, but every hit pays to decompress
+COMPRESS = os.environ.get('SEC_FILING_CACHE_COMPRESS', '').lower() in ('1', 'true', 'yes')
+STALE_TMP_AGE = 60 * 60
+# Other worker processes fill the same directory; rescan it every so many
+# puts (and whenever we think the budget is exceeded) to see their entries
+RESCAN_EVERY = 16
+
+
+class FilingCache:
+    """Size-bounded LRU cache of full-submission files keyed by (CIK, accession)"""
+
+    def __init__(self, cache_dir=CACHE_DIR, max_bytes=MAX_BYTES, compress=COMPRESS):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.compress = compress
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._puts = 0
+        self._entries, self._total_bytes = self._scan()  # path -> size, LRU first
+        self._evict()
+        if self._entries:
+            logger.info(f"Filing cache holds {len(self._entries)} filings ({self._total_bytes} bytes)")
+
+    def get(self, cik, accession_number, dest_path):
+        """Copy a cached filing to dest_path; returns False on a miss"""
+        path = self._path(cik, accession_number)
+        try:
+            if self.compress:
+                with gzip.open(path, 'rb') as src, open(dest_path, 'wb') as dest:
+                    shutil.copyfileobj(src, dest)
+            else:
+                _link_or_copy(path, dest_path)
+            # Persist recency so LRU order survives restarts
+            os.utime(path)
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+                self._forget(path)
+            return False
+        except (IOError, OSError, EOFError) as e:
+            logger.error(f"Discarding unreadable cache entry {path}: {str(e)}")
+            with self._lock:
+                self.misses += 1
+                self._remove(path)
+            return False
+
+        with self._lock:
+            self.hits += 1
+            if path in self._entries:
+                self._entries.move_to_end(path)
+            else:
+                # Added by another worker process sharing the directory
+                self._track(path, os.path.getsize(path))
+        return True
+
+    def put(self, cik, accession_number, src_path):
+        """Atomically add a downloaded filing to the cache"""
+        path = self._path(cik, accession_number)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+        try:
+            if self.compress:
+                with open(src_path, 'rb') as src, gzip.open(tmp_path, 'wb') as dest:
+                    shutil.copyfileobj(src, dest)
+            else:
+                _link_or_copy(src_path, tmp_path)
+            size = os.path.getsize(tmp_path)
+            if size > self.max_bytes:
+                os.remove(tmp_path)
+                return
+            # A hard link keeps the download's mtime; recency is the put
+            os.utime(tmp_path)
+            os.replace(tmp_path, path)
+        except (IOError, OSError) as e:
+            logger.error(f"Failed to cache {accession_number}: {str(e)}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return
+
+        with self._lock:
+            self._forget(path)
+            self._track(path, size)
+            self._puts += 1
+            rescan = self._puts % RESCAN_EVERY == 0 or self._total_bytes > self.max_bytes
+
+        if rescan:
+            # Budget against what every process has put on disk. Walk it
+            # without the lock so cache hits are never stuck behind it
+            entries, total_bytes = self._scan()
+            with self._lock:
+                self._entries, self._total_bytes = entries, total_bytes
+
+        with self._lock:
+            self._evict()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self._total_bytes,
+                'max_bytes': self.max_bytes,
+            }
+
+    def _path(self, cik, accession_number):
+        suffix = '.txt.gz' if self.compress else '.txt'
+        return os.path.join(self.cache_dir, str(int(cik)), f'{accession_number}{suffix}')
+
+    def _scan(self):
+        """Return (entries, total_bytes) on disk; mtime orders recency"""
+        found = []
+        for root, dirs, files in os.walk(self.cache_dir):
+            for file in files:
+                path = os.path.join(root, file)
+                try:
+                    stat = os.stat(path)
+                    if file.endswith('.tmp'):
+                        # Left behind by a worker that died mid-write
+                        if time.time() - stat.st_mtime > STALE_TMP_AGE:
+                            os.remove(path)
+                        continue
+                except FileNotFoundError:
+                    # Evicted or renamed by another worker meanwhile
+                    continue
+                found.append((stat.st_mtime, path, stat.st_size))
+
+        entries = OrderedDict((path, size) for _, path, size in sorted(found))
+        return entries, sum(entries.values())
+
+    def _track(self, path, size):
+        self._entries[path] = size
+        self._total_bytes += size
+
+    def _forget(self, path):
+        size = self._entries.pop(path, None)
+        if size is not None:
+            self._total_bytes -= size
+
+    def _remove(self, path):
+        self._forget(path)
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def _evict(self):
+        while self._total_bytes > self.max_bytes and self._entries:
+            path = next(iter(self._entries))
+            self._remove(path)
+            self.evictions += 1
+
+
+def _link_or_copy(src, dest):
+    # Hard links make cache hits free; fall back to a copy across filesystems
+    if os.path.lexists(dest):
+        os.remove(dest)
+    try:
+        os.link(src, dest)
+    except OSError:
+        shutil.copyfile(src, dest)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_filing_cache():
+    """Return the process-wide filing cache"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = FilingCache()
+        return _cache
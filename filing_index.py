@@ -0,0 +1,205 @@
+import json
+import os
+import threading
+import time
+import logging
+from collections import OrderedDict
+
+from sec_client import SEC_DATA_URL, sec_get
+
+logger = logging.getLogger(__name__)
+
+SUBMISSIONS_URL = f'{SEC_DATA_URL}/submissions/'
+
+INDEX_DIR = os.path.join('/tmp', 'sec_filing_index')
+# New filings only show up in the main submissions file, which is cheap to
+# revalidate; paginated history files never change once published
+INDEX_TTL = 60 * 60
+MAX_COMPANIES = 1000  # companies kept in memory; the rest reload from disk
+
+
+class CompanyFilings:
+    """Every filing a company has made, indexed by (form, year)"""
+
+    def __init__(self, cik, rows=(), etag=None, last_modified=None, fetched_at=0,
+                 pages=(), fetched_pages=()):
+        self.cik = cik
+        self.etag = etag
+        self.last_modified = last_modified
+        self.fetched_at = fetched_at
+        self.pages = list(pages)
+        self.fetched_pages = set(fetched_pages)
+        self._rows = {}
+        self._by_filing_year = {}
+        self._by_report_year = {}
+        self.add(rows)
+
+    def add(self, rows):
+        """Merge [form, filing_date, report_date, accession_number] rows"""
+        for row in rows:
+            form, filing_date, report_date, accession_number = row
+            if accession_number in self._rows:
+                continue
+            self._rows[accession_number] = row
+            self._by_filing_year.setdefault((form, int(filing_date[:4])), []).append(row)
+            if report_date:
+                self._by_report_year.setdefault((form, int(report_date[:4])), []).append(row)
+
+    def lookup(self, forms, years=None, by='filing'):
+        """Return (form, filing_date, accession_number) newest first
+
+        by='filing' matches years against the filing date and by='report'
+        against the period of report (the fiscal year end).
+        """
+        index = self._by_report_year if by == 'report' else self._by_filing_year
+        if years:
+            rows = [row for form in set(forms) for year in set(years) for row in index.get((form, year), [])]
+        else:
+            rows = [row for row in self._rows.values() if row[0] in forms]
+        rows.sort(key=lambda row: row[1], reverse=True)
+        return [(form, filing_date, accession_number)
+                for form, filing_date, report_date, accession_number in rows]
+
+    def to_dict(self):
+        return {
+            'etag': self.etag,
+            'last_modified': self.last_modified,
+            'fetched_at': self.fetched_at,
+            'pages': self.pages,
+            'fetched_pages': sorted(self.fetched_pages),
+            'rows': list(self._rows.values()),
+        }
+
+
+class FilingIndex:
+    """Per-CIK filing index covering the full submissions history"""
+
+    def __init__(self, index_dir=INDEX_DIR, ttl=INDEX_TTL, max_companies=MAX_COMPANIES):
+        self.index_dir = index_dir
+        self.ttl = ttl
+        self.max_companies = max_companies
+        self._lock = threading.Lock()
+        self._cik_locks = {}
+        self._companies = OrderedDict()
+        os.makedirs(self.index_dir, exist_ok=True)
+
+    def get(self, cik, email):
+        """Return the CompanyFilings for a CIK, refreshing it if stale"""
+        cik = str(cik).zfill(10)
+        with self._lock:
+            cik_lock = self._cik_locks.setdefault(cik, threading.Lock())
+
+        # One refresh per company at a time; other callers wait and reuse it
+        with cik_lock:
+            company = self._cached(cik)
+            if company is None or time.time() - company.fetched_at >= self.ttl:
+                company = self._refresh(cik, company, email)
+        return company
+
+    def lookup(self, cik, email, forms, years=None, by='filing'):
+        return self.get(cik, email).lookup(forms, years, by)
+
+    def _cached(self, cik):
+        with self._lock:
+            company = self._companies.get(cik)
+            if company is not None:
+                self._companies.move_to_end(cik)
+                return company
+
+        try:
+            with open(self._path(cik), 'r', encoding='utf-8') as f:
+                company = CompanyFilings(cik, **json.load(f))
+        except FileNotFoundError:
+            return None
+        except (IOError, ValueError, TypeError) as e:
+            logger.error(f"Ignoring unreadable filing index for CIK {cik}: {str(e)}")
+            return None
+
+        self._remember(company)
+        return company
+
+    def _refresh(self, cik, current, email):
+        # Build on a copy so readers of the current entry never see it change
+        company = CompanyFilings(cik, **current.to_dict()) if current else CompanyFilings(cik)
+
+        headers = {}
+        if company.etag:
+            headers['If-None-Match'] = company.etag
+        if company.last_modified:
+            headers['If-Modified-Since'] = company.last_modified
+
+        response = sec_get(f"{SUBMISSIONS_URL}CIK{cik}.json", email, headers=headers)
+
+        if response.status_code == 200:
+            submissions = response.json()
+            company.add(_rows(submissions['filings']['recent']))
+            company.pages = [page['name'] for page in submissions['filings'].get('files', [])]
+            company.etag = response.headers.get('ETag')
+            company.last_modified = response.headers.get('Last-Modified')
+        elif response.status_code != 304:
+            error_msg = f"Error accessing SEC data: {response.status_code} - {response.text}"
+            logger.error(error_msg)
+            raise Exception(error_msg)
+
+        # Older filings live in paginated files; each only needs fetching once
+        for name in company.pages:
+            if name in company.fetched_pages:
+                continue
+            response = sec_get(f"{SUBMISSIONS_URL}{name}", email)
+            if response.status_code != 200:
+                # Leave it unfetched so the next refresh retries it
+                logger.error(f"Failed to get submissions page {name}: {response.status_code}")
+                continue
+            company.add(_rows(response.json()))
+            company.fetched_pages.add(name)
+
+        # An incomplete history stays stale, so the next lookup refreshes
+        # again instead of missing older filings for a whole TTL
+        if not set(company.pages) - company.fetched_pages:
+            company.fetched_at = time.time()
+        self._remember(company)
+        self._save(company)
+        return company
+
+    def _remember(self, company):
+        with self._lock:
+            self._companies[company.cik] = company
+            self._companies.move_to_end(company.cik)
+            while len(self._companies) > self.max_companies:
+                self._companies.popitem(last=False)
+
+    def _path(self, cik):
+        return os.path.join(self.index_dir, f'CIK{cik}.json')
+
+    def _save(self, company):
+        path = self._path(company.cik)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(company.to_dict(), f, separators=(',', ':'))
+            os.replace(tmp_path, path)
+        except IOError as e:
+            logger.error(f"Failed to persist filing index for CIK {company.cik}: {str(e)}")
+
+
+def _rows(columns):
+    # Submissions JSON is columnar: parallel lists keyed by field name
+    return zip(
+        columns['form'],
+        columns['filingDate'],
+        columns.get('reportDate') or [''] * len(columns['form']),
+        columns['accessionNumber'],
+    )
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_filing_index():
+    """Return the process-wide filing index"""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = FilingIndex()
+        return _index
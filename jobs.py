@@ -0,0 +1,179 @@
+import json
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from archive import iter_zip, next_files, filing_entries
+from sec_downloader import iter_downloads
+
+logger = logging.getLogger(__name__)
+
+# Each job gets its own directory here; job.json holds its state so any
+# worker process on the host can answer status and result requests
+JOBS_DIR = os.path.join('/tmp', 'sec_jobs')
+JOB_TTL = 60 * 60  # finished jobs and their archives are kept for an hour
+JOB_WORKERS = 4
+
+# Jobs need a long-running server (e.g. the Docker image). On Vercel work is
+# frozen once the response is sent and /tmp is not shared between instances,
+# so a job would stall and polls could land on an instance that never saw it
+JOBS_ENABLED = not os.environ.get('VERCEL')
+
+STATE_FILE = 'job.json'
+RESULT_FILE = 'sec_filings.zip'
+FINISHED = ('complete', 'failed')
+
+_JOB_ID = re.compile(r'[0-9a-f]{32}')
+
+
+class JobManager:
+    """Runs download jobs on a background pool with per-job work directories"""
+
+    def __init__(self, jobs_dir=JOBS_DIR, ttl=JOB_TTL, workers=JOB_WORKERS):
+        self.jobs_dir = jobs_dir
+        self.ttl = ttl
+        self._pool = ThreadPoolExecutor(max_workers=workers)
+        os.makedirs(self.jobs_dir, exist_ok=True)
+
+    def create(self, tickers, email, years):
+        """Queue a download job and return its ID"""
+        self.cleanup()
+
+        job_id = uuid.uuid4().hex
+        os.makedirs(self._job_dir(job_id))
+        now = time.time()
+        state = {
+            'id': job_id,
+            'status': 'queued',
+            'created_at': now,
+            'updated_at': now,
+            'tickers': tickers,
+            'years': years,
+            'filings': [],
+            'errors': [],
+            'error': None,
+        }
+        self._save(state)
+        self._pool.submit(self._run, state, email)
+        logger.info(f"Queued job {job_id} for {', '.join(tickers)}")
+        return job_id
+
+    def get(self, job_id):
+        """Return the job's state dict, or None if it is unknown or expired"""
+        if not _JOB_ID.fullmatch(job_id):
+            return None
+        try:
+            with open(os.path.join(self._job_dir(job_id), STATE_FILE), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def result_path(self, job_id):
+        return os.path.join(self._job_dir(job_id), RESULT_FILE)
+
+    def cleanup(self):
+        """Remove finished jobs older than the TTL"""
+        now = time.time()
+        for job_id in os.listdir(self.jobs_dir):
+            job_dir = self._job_dir(job_id)
+            state_path = os.path.join(job_dir, STATE_FILE)
+            try:
+                with open(state_path, 'r', encoding='utf-8') as f:
+                    status = json.load(f).get('status')
+                # Queued jobs can wait past the TTL for a free worker
+                if status not in FINISHED:
+                    continue
+                age = now - os.path.getmtime(state_path)
+            except ValueError:
+                logger.error(f"Ignoring unreadable state for job {job_id}")
+                continue
+            except FileNotFoundError:
+                # Half-created job; fall back to the directory itself
+                try:
+                    age = now - os.path.getmtime(job_dir)
+                except FileNotFoundError:
+                    continue
+            if age > self.ttl:
+                shutil.rmtree(job_dir, ignore_errors=True)
+                logger.info(f"Removed expired job {job_id}")
+
+    def _run(self, state, email):
+        job_dir = self._job_dir(state['id'])
+        filings = {}
+
+        def progress(ticker, form, filing_date, accession_number, status):
+            # Same-day filings of one form are distinct; key on the accession
+            key = (ticker, accession_number)
+            if key not in filings:
+                filings[key] = {'ticker': ticker, 'form': form, 'filing_date': filing_date,
+                                'accession_number': accession_number}
+                state['filings'].append(filings[key])
+            filings[key]['status'] = status
+            self._save(state)
+
+        state['status'] = 'running'
+        self._save(state)
+
+        try:
+            work_dir = os.path.join(job_dir, 'filings')
+            # mkdir, not makedirs: if the job directory is gone, fail the
+            # job instead of quietly recreating it
+            os.mkdir(work_dir)
+            events = iter_downloads(state['tickers'], email, base_dir=work_dir,
+                                    years=state['years'], progress=progress)
+            errors = state['errors']
+            files = next_files(events, errors)
+
+            if not files:
+                state['status'] = 'failed'
+                state['error'] = errors[0] if errors else 'No files were downloaded'
+                return
+
+            tmp_path = self.result_path(state['id']) + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                for chunk in iter_zip(filing_entries(files, events, errors, work_dir)):
+                    f.write(chunk)
+            os.replace(tmp_path, self.result_path(state['id']))
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+            state['status'] = 'complete'
+            logger.info(f"Job {state['id']} complete")
+        except Exception as e:
+            logger.error(f"Job {state['id']} failed: {str(e)}")
+            state['status'] = 'failed'
+            state['error'] = str(e)
+        finally:
+            self._save(state)
+
+    def _job_dir(self, job_id):
+        return os.path.join(self.jobs_dir, job_id)
+
+    def _save(self, state):
+        state['updated_at'] = time.time()
+        path = os.path.join(self._job_dir(state['id']), STATE_FILE)
+        tmp_path = f"{path}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(state, f)
+            os.replace(tmp_path, path)
+        except IOError as e:
+            # The job was expired out from under us; nothing left to update
+            logger.error(f"Failed to save state for job {state['id']}: {str(e)}")
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_job_manager():
+    """Return the process-wide job manager"""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = JobManager()
+        return _manager
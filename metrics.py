@@ -0,0 +1,93 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Percentiles are computed over the most recent samples of each stage
+MAX_SAMPLES = 1000
+
+
+class Metrics:
+    """Thread-safe per-stage timings and counters for this process"""
+
+    def __init__(self, max_samples=MAX_SAMPLES):
+        self.max_samples = max_samples
+        self._lock = threading.Lock()
+        self._stages = {}
+        self._counters = {}
+
+    def record(self, stage, seconds):
+        with self._lock:
+            stats = self._stages.get(stage)
+            if stats is None:
+                stats = self._stages[stage] = {
+                    'count': 0,
+                    'total': 0.0,
+                    'max': 0.0,
+                    'samples': deque(maxlen=self.max_samples),
+                }
+            stats['count'] += 1
+            stats['total'] += seconds
+            stats['max'] = max(stats['max'], seconds)
+            stats['samples'].append(seconds)
+
+    def increment(self, name, value=1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    @contextmanager
+    def timer(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start)
+
+    def snapshot(self):
+        """Return stage timings (seconds) and counters as plain dicts"""
+        with self._lock:
+            stages = {}
+            for stage, stats in self._stages.items():
+                samples = sorted(stats['samples'])
+                stages[stage] = {
+                    'count': stats['count'],
+                    'total': stats['total'],
+                    'mean': stats['total'] / stats['count'],
+                    'p50': percentile(samples, 50),
+                    'p99': percentile(samples, 99),
+                    'max': stats['max'],
+                }
+            return {'stages': stages, 'counters': dict(self._counters)}
+
+    def reset(self):
+        with self._lock:
+            self._stages.clear()
+            self._counters.clear()
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+_metrics = Metrics()
+
+
+def get_metrics():
+    """Return the process-wide metrics registry"""
+    return _metrics
+
+
+def record(stage, seconds):
+    _metrics.record(stage, seconds)
+
+
+def increment(name, value=1):
+    _metrics.increment(name, value)
+
+
+def timer(stage):
+    return _metrics.timer(stage)
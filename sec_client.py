@@ -0,0 +1,176 @@
+import os
+import random
+import threading
+import time
+import logging
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import metrics
+
+try:
+    import fcntl
+except ImportError:  # Windows has no flock; fall back to a per-process bucket
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Base URLs can be pointed elsewhere, e.g. at bench/fake_edgar.py
+SEC_WWW_URL = os.environ.get('SEC_WWW_URL', 'https://www.sec.gov')
+SEC_DATA_URL = os.environ.get('SEC_DATA_URL', 'https://data.sec.gov')
+
+# SEC fair-access policy: no more than 10 requests per second per client
+RATE_LIMIT = float(os.environ.get('SEC_RATE_LIMIT', 10))
+# Shared by every worker process on the host so they draw from one bucket
+RATE_LIMIT_STATE = os.path.join('/tmp', 'sec_rate_limit.state')
+
+SEC_HOSTS = [SEC_WWW_URL, SEC_DATA_URL]
+POOL_SIZE = 10
+REQUEST_TIMEOUT = 30
+
+MAX_RETRIES = 5
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 30
+RETRY_STATUSES = (429, 503)
+
+
+class TokenBucket:
+    """Thread- and process-safe token bucket"""
+
+    # A bucket holding `rate` tokens lets a burst of that many through on
+    # top of the refill, nearly doubling the rate for the first second.
+    # One token keeps any one-second window at `rate` requests.
+    def __init__(self, rate, capacity=1, state_path=None):
+        self.rate = rate
+        self.capacity = capacity
+        self.state_path = state_path if fcntl else None
+        self._lock = threading.Lock()
+        self._tokens = self.capacity
+        self._updated = time.time()
+
+    def acquire(self):
+        """Block until a token is available and consume it"""
+        while True:
+            with self._lock:
+                if self.state_path:
+                    wait = self._take_shared()
+                else:
+                    wait = self._take_local()
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+    def _take(self, tokens, updated):
+        now = time.time()
+        tokens = min(self.capacity, tokens + max(0, now - updated) * self.rate)
+        if tokens >= 1:
+            return tokens - 1, now, 0
+        return tokens, now, (1 - tokens) / self.rate
+
+    def _take_local(self):
+        self._tokens, self._updated, wait = self._take(self._tokens, self._updated)
+        return wait
+
+    def _take_shared(self):
+        try:
+            fd = os.open(self.state_path, os.O_RDWR | os.O_CREAT, 0o644)
+        except OSError as e:
+            logger.error(f"Rate limit state unavailable, using local bucket: {str(e)}")
+            self.state_path = None
+            return self._take_local()
+
+        with os.fdopen(fd, 'r+') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                try:
+                    tokens, updated = (float(v) for v in f.read().split())
+                except ValueError:
+                    tokens, updated = self.capacity, time.time()
+                tokens, updated, wait = self._take(tokens, updated)
+                f.seek(0)
+                f.truncate()
+                f.write(f"{tokens} {updated}")
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+        return wait
+
+
+class SECClient:
+    """Pooled HTTP client for SEC endpoints with rate limiting and backoff"""
+
+    def __init__(self, rate_limiter=None, max_retries=MAX_RETRIES, timeout=REQUEST_TIMEOUT):
+        self.rate_limiter = rate_limiter or TokenBucket(RATE_LIMIT, state_path=RATE_LIMIT_STATE)
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers['Accept-Encoding'] = 'gzip, deflate'
+        for host in SEC_HOSTS:
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE)
+            self.session.mount(host, adapter)
+
+    def get(self, url, email, headers=None, **kwargs):
+        """GET a SEC URL, retrying 429/503 responses and connection errors"""
+        request_headers = {'User-Agent': f'Company Research Tool ({email})'}
+        if headers:
+            request_headers.update(headers)
+        kwargs.setdefault('timeout', self.timeout)
+
+        for attempt in range(self.max_retries + 1):
+            self.rate_limiter.acquire()
+            try:
+                response = self.session.get(url, headers=request_headers, **kwargs)
+                metrics.increment('sec_requests')
+            except (requests.ConnectionError, requests.Timeout) as e:
+                metrics.increment('sec_request_errors')
+                if attempt == self.max_retries:
+                    raise
+                delay = self._backoff(attempt)
+                logger.warning(f"Request to {url} failed ({str(e)}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+                continue
+
+            if response.status_code not in RETRY_STATUSES or attempt == self.max_retries:
+                return response
+
+            metrics.increment('sec_throttled')
+            delay = self._retry_after(response) or self._backoff(attempt)
+            logger.warning(f"SEC returned {response.status_code} for {url}, retrying in {delay:.1f}s")
+            response.close()
+            time.sleep(delay)
+
+    def _backoff(self, attempt):
+        delay = min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt))
+        return delay * random.uniform(0.5, 1)
+
+    def _retry_after(self, response):
+        value = response.headers.get('Retry-After')
+        if not value:
+            return None
+        try:
+            return min(BACKOFF_MAX, max(0, float(value)))
+        except ValueError:
+            pass
+        try:
+            retry_at = parsedate_to_datetime(value).timestamp()
+        except (TypeError, ValueError):
+            return None
+        return min(BACKOFF_MAX, max(0, retry_at - time.time()))
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Return the process-wide SEC client"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = SECClient()
+        return _client
+
+
+def sec_get(url, email, **kwargs):
+    return get_client().get(url, email, **kwargs)
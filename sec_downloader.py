@@ -1,130 +1,276 @@
-import requests
-import time
 import os
 import re
-from bs4 import BeautifulSoup
+import time
+import requests
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 import logging
+import metrics
+from filing_cache import get_filing_cache
+from filing_index import get_filing_index
+from sec_client import SEC_WWW_URL, sec_get
+from sgml_splitter import SubmissionSplitter
+from ticker_index import lookup_cik
 
 logger = logging.getLogger(__name__)
 
-def download_10k(ticker, email='your-email@example.com', base_dir='sec_downloads', years=None):
+ANNUAL_FORMS = ['10-K', '20-F']  # 20-F is the foreign company annual report
+
+# Workers only overlap network waits; the shared rate limiter still caps
+# the request rate, so a handful is enough to saturate it
+MAX_WORKERS = 8
+
+CHUNK_SIZE = 64 * 1024
+
+
+def find_annual_filings(ticker, email, years=None):
+    """Resolve a ticker and return (cik, [(form, filing_date, accession_number)])"""
+    logger.info(f"Processing {ticker}...")
+    logger.info("1. Getting company information...")
+
+    # Step 1: Get the CIK number from the process-wide ticker index
+    with metrics.timer('cik_lookup'):
+        cik = lookup_cik(ticker, email)
+
+    if not cik:
+        error_msg = f"Could not find CIK for {ticker}"
+        logger.error(error_msg)
+        raise Exception(error_msg)
+
+    logger.info(f"Found CIK: {cik}")
+
+    # Step 2: Get every annual report from the company's filing index,
+    # including older ones only listed in the paginated submissions files
+    logger.info("2. Looking for most recent 10-K...")
+    with metrics.timer('submissions_fetch'):
+        matches = get_filing_index().lookup(cik, email, ANNUAL_FORMS, years)
+
+    for form, filing_date, accession_number in matches:
+        logger.info(f"Found {form} filed on {filing_date}")
+
+    return cik, matches
+
+
+def download_filing(ticker, cik, form, filing_date, accession_number, email, base_dir,
+                    exhibits=None, use_cache=True):
+    """Download one filing into base_dir/ticker and return the saved paths
+
+    Saves the full submission plus its primary document. exhibits is an
+    optional list of document type prefixes (e.g. ['EX-21']) to save too.
+    use_cache=False bypasses the shared filing cache, for bulk jobs that
+    would otherwise evict the entries interactive requests rely on.
+    """
+    # Construct EDGAR URL
+    acc_no_stripped = accession_number.replace('-', '')
+    url = f"{SEC_WWW_URL}/Archives/edgar/data/{int(cik)}/{acc_no_stripped}/{accession_number}.txt"
+
+    # base_dir belongs to the caller; if it has already been cleaned up,
+    # fail instead of recreating it where nothing will ever remove it
+    company_dir = os.path.join(base_dir, ticker)
+    try:
+        os.mkdir(company_dir)
+    except FileExistsError:
+        pass
+
+    # A company can file several of the same form on one day (late filers
+    # catching up), and those download concurrently, so key names on the
+    # accession number too
+    safe_form = re.sub(r'[^\w.-]', '_', form)  # e.g. 10-K/A
+    stem = f'{safe_form}_{filing_date}_{accession_number}'
+    raw_filename = os.path.join(company_dir, f'{stem}_full.txt')
+    documents = []
+
+    def select(doc):
+        # The primary document is always the first one in the submission
+        if not documents:
+            name = f'{stem}{_document_extension(doc)}'
+        elif exhibits and doc.get('type', '').startswith(tuple(exhibits)):
+            doc_type = re.sub(r'[^\w.-]', '_', doc['type'])
+            name = f"{stem}_{doc_type}_{doc.get('sequence', '')}{_document_extension(doc)}"
+        else:
+            return None
+        path = os.path.join(company_dir, name)
+        documents.append(path)
+        return open(path, 'wb')
+
+    splitter = SubmissionSplitter(select)
+    cache = get_filing_cache() if use_cache else None
+    # Splitting is interleaved with the download, so time it separately
+    parse_time = 0
+    start = time.perf_counter()
+
+    try:
+        if cache and cache.get(cik, accession_number, raw_filename):
+            logger.info(f"Serving {accession_number} from cache")
+            with open(raw_filename, 'rb') as f:
+                for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+                    parse_start = time.perf_counter()
+                    splitter.feed(chunk)
+                    parse_time += time.perf_counter() - parse_start
+        else:
+            response = sec_get(url, email, stream=True)
+
+            try:
+                if response.status_code != 200:
+                    error_msg = f"Failed to download document: {response.status_code}"
+                    logger.error(error_msg)
+                    raise Exception(error_msg)
+
+                # Never truncate in place: the path may be hard linked to a
+                # cache entry from an earlier request
+                if os.path.lexists(raw_filename):
+                    os.remove(raw_filename)
+                # Stream to disk and split documents out as the bytes arrive
+                with open(raw_filename, 'wb') as f:
+                    for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                        f.write(chunk)
+                        parse_start = time.perf_counter()
+                        splitter.feed(chunk)
+                        parse_time += time.perf_counter() - parse_start
+            finally:
+                response.close()
+
+            if cache:
+                cache.put(cik, accession_number, raw_filename)
+    except requests.RequestException:
+        raise
+    except IOError as e:
+        error_msg = f"Failed to write files: {str(e)}"
+        logger.error(error_msg)
+        raise IOError(error_msg)
+    finally:
+        splitter.close()
+
+    metrics.record('parse', parse_time)
+    metrics.record('filing_download', time.perf_counter() - start - parse_time)
+    logger.info(f"Saved: {raw_filename} & {len(documents)} documents")
+    return [raw_filename] + documents
+
+
+def _document_extension(doc):
+    ext = os.path.splitext(doc.get('filename', ''))[1].lower()
+    if ext in ('.htm', '.html'):
+        return '.html'
+    # Pre-2001 filings are plain text and carry no <FILENAME>
+    return ext or '.txt'
+
+
+def download_10k(ticker, email='your-email@example.com', base_dir='sec_downloads', years=None,
+                 exhibits=None):
     """Download the complete 10-K filing for a given ticker"""
-    
+
     try:
         # Create downloads directory - use /tmp for Vercel
         base_dir = os.path.join('/tmp', base_dir)
         os.makedirs(base_dir, exist_ok=True)
-        
-        headers = {
-            'User-Agent': f'Company Research Tool ({email})',
-            'Accept-Encoding': 'gzip, deflate'
-        }
 
-        logger.info(f"Processing {ticker}...")
-        logger.info("1. Getting company information...")
-        
-        # Step 1: Get the CIK number
-        response = requests.get(
-            'https://www.sec.gov/files/company_tickers.json',
-            headers=headers
-        )
-        
-        if response.status_code != 200:
-            error_msg = f"Failed to get company tickers: {response.status_code} - {response.text}"
-            logger.error(error_msg)
-            raise Exception(error_msg)
+        cik, filings = find_annual_filings(ticker, email, years)
 
-        companies_data = response.json()
-        cik = None
-        
-        for entry in companies_data.values():
-            if entry['ticker'].upper() == ticker.upper():
-                cik = str(entry['cik_str']).zfill(10)
-                break
-        
-        if not cik:
-            error_msg = f"Could not find CIK for {ticker}"
-            logger.error(error_msg)
-            raise Exception(error_msg)
-            
-        logger.info(f"Found CIK: {cik}")
-        time.sleep(0.1)  # Reduced rate limit for serverless
-
-        # Step 2: Get company's submissions
-        company_url = f"https://data.sec.gov/submissions/CIK{cik}.json"
-        headers['Host'] = 'data.sec.gov'
-        response = requests.get(company_url, headers=headers)
-        time.sleep(0.1)  # Reduced rate limit for serverless
-        
-        if response.status_code != 200:
-            error_msg = f"Error accessing SEC data: {response.status_code} - {response.text}"
+        if not filings:
+            error_msg = "No 10-K or 20-F filings found"
             logger.error(error_msg)
             raise Exception(error_msg)
-            
-        filings = response.json()
-        logger.info("2. Looking for most recent 10-K...")
-        
-        recent_filings = filings['filings']['recent']
-        found = False
+
         downloaded_count = 0
-        
-        # Look for both '10-K' and '20-F' (foreign company annual report)
-        for i, form in enumerate(recent_filings['form']):
-            if form in ['10-K', '20-F']:
-                filing_date = recent_filings['filingDate'][i]
-                filing_year = int(filing_date.split('-')[0])
-                
-                # Skip if not in requested years
-                if years and filing_year not in years:
-                    continue
+        for form, filing_date, accession_number in filings:
+            try:
+                download_filing(ticker, cik, form, filing_date, accession_number, email, base_dir,
+                                exhibits)
+                downloaded_count += 1
+            except IOError:
+                raise
+            except Exception:
+                continue
+
+        return downloaded_count > 0
 
-                found = True
-                accession_number = recent_filings['accessionNumber'][i]
-                
-                logger.info(f"Found {form} filed on {filing_date}")
+    except Exception as e:
+        logger.error(f"Error processing {ticker}: {str(e)}")
+        raise  # Re-raise the exception to be handled by the caller
 
-                # Construct EDGAR URL
-                acc_no_stripped = accession_number.replace('-', '')
-                url = f"https://www.sec.gov/Archives/edgar/data/{int(cik)}/{acc_no_stripped}/{accession_number}.txt"
 
-                headers['Host'] = 'www.sec.gov'
-                response = requests.get(url, headers=headers)
-                time.sleep(0.1)  # Reduced rate limit for serverless
+def iter_downloads(tickers, email='your-email@example.com', base_dir='sec_downloads', years=None,
+                   exhibits=None, max_workers=MAX_WORKERS, progress=None):
+    """Download annual reports for several tickers concurrently
 
-                if response.status_code == 200:
-                    company_dir = os.path.join(base_dir, ticker)
-                    os.makedirs(company_dir, exist_ok=True)
+    Yields (ticker, files, error) as each filing finishes, or as a ticker
+    fails to resolve, so callers can start using results before the whole
+    batch is done. A failure never aborts the rest of the batch. If given,
+    progress(ticker, form, filing_date, accession_number, status) is called
+    as each filing is queued ('pending') and when it is 'done' or has 'failed'.
+    """
+    base_dir = os.path.join('/tmp', base_dir)
+    os.makedirs(base_dir, exist_ok=True)
 
-                    raw_filename = os.path.join(company_dir, f'{form}_{filing_date}_full.txt')
-                    html_filename = os.path.join(company_dir, f'{form}_{filing_date}.html')
+    tickers = list(dict.fromkeys(ticker.upper() for ticker in tickers))
+    pool = ThreadPoolExecutor(max_workers=max_workers)
 
+    try:
+        pending = {
+            pool.submit(find_annual_filings, ticker, email, years): (ticker, None)
+            for ticker in tickers
+        }
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                ticker, filing = pending.pop(future)
+
+                if filing is None:
                     try:
-                        with open(raw_filename, 'w', encoding='utf-8') as f:
-                            f.write(response.text)
-                        
-                        # Save HTML version
-                        soup = BeautifulSoup(response.text, 'html.parser')
-                        with open(html_filename, 'w', encoding='utf-8') as f:
-                            f.write(str(soup))
-
-                        logger.info(f"Saved: {raw_filename} & {html_filename}")
-                        downloaded_count += 1
-                    except IOError as e:
-                        error_msg = f"Failed to write files: {str(e)}"
-                        logger.error(error_msg)
-                        raise Exception(error_msg)
-                else:
-                    error_msg = f"Failed to download document: {response.status_code}"
-                    logger.error(error_msg)
+                        cik, filings = future.result()
+                    except Exception as e:
+                        yield ticker, [], str(e)
+                        continue
+
+                    if not filings:
+                        yield ticker, [], "No 10-K or 20-F filings found"
+                        continue
+
+                    # Queue each ticker's filings as soon as its submissions
+                    # arrive so downloads overlap with the remaining lookups
+                    for form, filing_date, accession_number in filings:
+                        download = pool.submit(download_filing, ticker, cik, form, filing_date,
+                                               accession_number, email, base_dir, exhibits)
+                        pending[download] = (ticker, (form, filing_date, accession_number))
+                        if progress:
+                            progress(ticker, form, filing_date, accession_number, 'pending')
                     continue
 
-        if not found:
-            error_msg = "No 10-K or 20-F filings found"
-            logger.error(error_msg)
-            raise Exception(error_msg)
-            
-        return downloaded_count > 0
-            
-    except Exception as e:
-        logger.error(f"Error processing {ticker}: {str(e)}")
-        raise  # Re-raise the exception to be handled by the caller
+                form, filing_date, accession_number = filing
+                try:
+                    files = future.result()
+                except Exception as e:
+                    if progress:
+                        progress(ticker, form, filing_date, accession_number, 'failed')
+                    yield ticker, [], f"{form} filed {filing_date}: {str(e)}"
+                    continue
+
+                if progress:
+                    progress(ticker, form, filing_date, accession_number, 'done')
+                yield ticker, files, None
+    finally:
+        # Stop queued work if the consumer goes away early, and let running
+        # downloads finish so the caller can safely remove base_dir
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def download_many(tickers, email='your-email@example.com', base_dir='sec_downloads', years=None,
+                  exhibits=None, max_workers=MAX_WORKERS):
+    """Download annual reports for several tickers concurrently
+
+    Returns {ticker: {'files': [...], 'errors': [...]}}; a failing ticker or
+    filing is recorded in its entry instead of aborting the batch.
+    """
+    tickers = list(dict.fromkeys(ticker.upper() for ticker in tickers))
+    results = {ticker: {'files': [], 'errors': []} for ticker in tickers}
+
+    for ticker, files, error in iter_downloads(tickers, email, base_dir, years, exhibits, max_workers):
+        results[ticker]['files'].extend(files)
+        if error:
+            results[ticker]['errors'].append(error)
+
+    for ticker, result in results.items():
+        if result['errors']:
+            logger.error(f"Error processing {ticker}: {'; '.join(result['errors'])}")
+
+    return results
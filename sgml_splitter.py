@@ -0,0 +1,141 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+DOCUMENT_TAG = b'<DOCUMENT>'
+TEXT_TAG = b'<TEXT>'
+TEXT_END_TAG = b'</TEXT>'
+XBRL_TAG = b'<XBRL>'
+XBRL_END_TAG = b'</XBRL>'
+
+# Bytes held back while streaming a document body so a closing tag split
+# across chunks, and the </XBRL> wrapper just before it, can still be seen
+TAIL_SIZE = 64
+# Document headers are a handful of short lines; anything bigger is garbage
+MAX_HEADER_SIZE = 64 * 1024
+
+_OUTSIDE, _HEADER, _TEXT = range(3)
+
+
+class SubmissionSplitter:
+    """Incremental splitter for EDGAR full-submission .txt files
+
+    A submission is an SGML envelope of <DOCUMENT> blocks, each with
+    <TYPE>/<SEQUENCE>/<FILENAME>/<DESCRIPTION> header lines followed by the
+    document body inside <TEXT>. Feed raw bytes in chunks of any size; for
+    each document select(header) is called with the parsed header dict and
+    may return a binary file object to receive the body, or None to skip it.
+    Bodies are written as they stream past and the file object is closed
+    when the document ends, so memory stays bounded by the chunk size.
+    """
+
+    def __init__(self, select):
+        self.select = select
+        self.documents = []
+        self._buffer = b''
+        self._state = _OUTSIDE
+        self._sink = None
+        self._leading = False
+        self._wrapper_checked = False
+
+    def feed(self, data):
+        self._buffer += data
+
+        while True:
+            if self._state == _OUTSIDE:
+                i = self._buffer.find(DOCUMENT_TAG)
+                if i < 0:
+                    self._buffer = self._buffer[-(len(DOCUMENT_TAG) - 1):]
+                    return
+                self._buffer = self._buffer[i + len(DOCUMENT_TAG):]
+                self._state = _HEADER
+
+            elif self._state == _HEADER:
+                i = self._buffer.find(TEXT_TAG)
+                if i < 0:
+                    if len(self._buffer) > MAX_HEADER_SIZE:
+                        raise ValueError("Malformed submission: document header too long")
+                    return
+                header = _parse_header(self._buffer[:i])
+                self._buffer = self._buffer[i + len(TEXT_TAG):]
+                self.documents.append(header)
+                self._sink = self.select(header)
+                self._leading = True
+                self._wrapper_checked = False
+                self._state = _TEXT
+
+            else:
+                i = self._buffer.find(TEXT_END_TAG)
+                if i < 0:
+                    if self._sink is None:
+                        self._buffer = self._buffer[-(len(TEXT_END_TAG) - 1):]
+                    elif len(self._buffer) > TAIL_SIZE:
+                        split = len(self._buffer) - TAIL_SIZE
+                        if self._write(self._buffer[:split], final=False):
+                            self._buffer = self._buffer[split:]
+                    return
+                if self._sink is not None:
+                    self._write(self._buffer[:i], final=True)
+                    self._close_sink()
+                self._buffer = self._buffer[i + len(TEXT_END_TAG):]
+                self._state = _OUTSIDE
+
+    def close(self):
+        """Flush a document left open by a truncated submission"""
+        if self._state == _TEXT and self._sink is not None:
+            logger.warning("Submission ended inside a document, saving what was received")
+            self._write(self._buffer, final=True)
+        self._close_sink()
+        self._buffer = b''
+        self._state = _OUTSIDE
+
+    def _write(self, data, final):
+        # Inline XBRL filings wrap the HTML in <XBRL>...</XBRL>; drop the
+        # wrapper so the saved file opens as a plain HTML document
+        if self._leading:
+            data = data.lstrip()
+            if not self._wrapper_checked:
+                if not final and len(data) < len(XBRL_TAG):
+                    return False
+                if data.startswith(XBRL_TAG):
+                    data = data[len(XBRL_TAG):].lstrip()
+                self._wrapper_checked = True
+            if not data and not final:
+                return True
+            self._leading = False
+        if final:
+            data = data.rstrip()
+            if data.endswith(XBRL_END_TAG):
+                data = data[:-len(XBRL_END_TAG)].rstrip()
+        self._sink.write(data)
+        return True
+
+    def _close_sink(self):
+        if self._sink is not None:
+            self._sink.close()
+            self._sink = None
+
+
+def _parse_header(raw):
+    header = {}
+    for line in raw.splitlines():
+        line = line.strip()
+        if not line.startswith(b'<'):
+            continue
+        end = line.find(b'>')
+        if end < 0:
+            continue
+        name = line[1:end].decode('ascii', 'replace').lower()
+        header[name] = line[end + 1:].strip().decode('utf-8', 'replace')
+    return header
+
+
+def split_submission(chunks, select):
+    """Run a SubmissionSplitter over an iterable of byte chunks"""
+    splitter = SubmissionSplitter(select)
+    try:
+        for chunk in chunks:
+            splitter.feed(chunk)
+    finally:
+        splitter.close()
+    return splitter.documents
@@ -0,0 +1,83 @@
+import os
+
+import filing_cache
+from filing_cache import FilingCache
+
+SIZE = 1000
+
+
+def _source(tmp_path, name):
+    path = tmp_path / f'{name}.txt'
+    path.write_bytes(name.encode()[:1] * SIZE)
+    return str(path)
+
+
+def _cached(cache):
+    return sorted(name for _, _, files in os.walk(cache.cache_dir) for name in files)
+
+
+def _disk_bytes(cache):
+    return sum(os.path.getsize(os.path.join(root, name))
+               for root, _, files in os.walk(cache.cache_dir) for name in files)
+
+
+def test_round_trip(tmp_path):
+    cache = FilingCache(cache_dir=str(tmp_path / 'cache'), max_bytes=10 * SIZE)
+    cache.put(320193, 'acc-a', _source(tmp_path, 'a'))
+
+    dest = str(tmp_path / 'out.txt')
+    assert cache.get(320193, 'acc-a', dest)
+    assert open(dest, 'rb').read() == b'a' * SIZE
+    assert not cache.get(320193, 'acc-missing', dest)
+    assert (cache.stats()['hits'], cache.stats()['misses']) == (1, 1)
+
+
+def test_evicts_least_recently_used_within_budget(tmp_path):
+    cache = FilingCache(cache_dir=str(tmp_path / 'cache'), max_bytes=3 * SIZE)
+    for name in 'abc':
+        cache.put(1, f'acc-{name}', _source(tmp_path, name))
+
+    # Reading a makes b the least recently used entry
+    assert cache.get(1, 'acc-a', str(tmp_path / 'out.txt'))
+    cache.put(1, 'acc-d', _source(tmp_path, 'd'))
+
+    assert _cached(cache) == ['acc-a.txt', 'acc-c.txt', 'acc-d.txt']
+    assert cache.stats()['bytes'] == _disk_bytes(cache) == 3 * SIZE
+    assert cache.stats()['evictions'] == 1
+
+
+def test_recency_survives_restart(tmp_path):
+    cache_dir = str(tmp_path / 'cache')
+    cache = FilingCache(cache_dir=cache_dir, max_bytes=3 * SIZE)
+    for name in 'abc':
+        cache.put(1, f'acc-{name}', _source(tmp_path, name))
+    assert cache.get(1, 'acc-a', str(tmp_path / 'out.txt'))
+
+    # A new process rebuilds the LRU order from mtimes on disk
+    restarted = FilingCache(cache_dir=cache_dir, max_bytes=3 * SIZE)
+    restarted.put(1, 'acc-d', _source(tmp_path, 'd'))
+
+    assert _cached(restarted) == ['acc-a.txt', 'acc-c.txt', 'acc-d.txt']
+
+
+def test_oversized_filing_is_not_cached(tmp_path):
+    cache = FilingCache(cache_dir=str(tmp_path / 'cache'), max_bytes=SIZE // 2)
+    cache.put(1, 'acc-a', _source(tmp_path, 'a'))
+
+    assert _cached(cache) == []
+    assert cache.stats()['bytes'] == 0
+
+
+def test_budget_covers_entries_from_other_processes(tmp_path, monkeypatch):
+    monkeypatch.setattr(filing_cache, 'RESCAN_EVERY', 2)
+    cache_dir = str(tmp_path / 'cache')
+    first = FilingCache(cache_dir=cache_dir, max_bytes=3 * SIZE)
+    second = FilingCache(cache_dir=cache_dir, max_bytes=3 * SIZE)
+
+    for i, cache in enumerate([first, second] * 4):
+        cache.put(1, f'acc-{i}', _source(tmp_path, str(i)))
+
+    # Neither cache alone saw more than 4 entries, but together they
+    # stay within one budget: the newest three puts survive
+    assert _cached(first) == ['acc-5.txt', 'acc-6.txt', 'acc-7.txt']
+    assert _disk_bytes(first) == 3 * SIZE
@@ -0,0 +1,74 @@
+import filing_index
+from filing_index import FilingIndex
+
+CIK = '0000320193'
+PAGE = f'CIK{CIK}-submissions-001.json'
+
+
+class _Response:
+    def __init__(self, status_code, data=None):
+        self.status_code = status_code
+        self.headers = {}
+        self.text = ''
+        self._data = data
+
+    def json(self):
+        return self._data
+
+
+def _columns(*rows):
+    return {
+        'form': [row[0] for row in rows],
+        'filingDate': [row[1] for row in rows],
+        'reportDate': [row[2] for row in rows],
+        'accessionNumber': [row[3] for row in rows],
+    }
+
+
+SUBMISSIONS = {
+    'filings': {
+        'recent': _columns(('10-K', '2024-11-01', '2024-09-28', '0000320193-24-000123')),
+        'files': [{'name': PAGE}],
+    },
+}
+HISTORY = _columns(('10-K', '2005-12-01', '2005-09-24', '0001104659-05-058421'))
+
+
+def _serve(monkeypatch, page_statuses):
+    requests = []
+
+    def sec_get(url, email, **kwargs):
+        requests.append(url)
+        if url.endswith(PAGE):
+            status = page_statuses.pop(0)
+            return _Response(status, HISTORY if status == 200 else None)
+        return _Response(200, SUBMISSIONS)
+
+    monkeypatch.setattr(filing_index, 'sec_get', sec_get)
+    return requests
+
+
+def test_history_pages_are_found(monkeypatch, tmp_path):
+    _serve(monkeypatch, [200])
+    index = FilingIndex(index_dir=str(tmp_path))
+
+    assert index.lookup(CIK, 'a@b.co', ['10-K'], [2005]) == [
+        ('10-K', '2005-12-01', '0001104659-05-058421')]
+    assert index.lookup(CIK, 'a@b.co', ['10-K'], [2024, 2024]) == [
+        ('10-K', '2024-11-01', '0000320193-24-000123')]
+
+
+def test_failed_history_page_is_retried_on_next_lookup(monkeypatch, tmp_path):
+    requests = _serve(monkeypatch, [500, 200])
+    index = FilingIndex(index_dir=str(tmp_path))
+
+    assert index.lookup(CIK, 'a@b.co', ['10-K'], [2005]) == []
+    # Not held back by the TTL: the missing page is fetched again
+    assert index.lookup(CIK, 'a@b.co', ['10-K'], [2005]) == [
+        ('10-K', '2005-12-01', '0001104659-05-058421')]
+    assert sum(url.endswith(PAGE) for url in requests) == 2
+
+    # Complete now, so further lookups are served without any requests
+    count = len(requests)
+    index.lookup(CIK, 'a@b.co', ['10-K'], [2005])
+    assert len(requests) == count
@@ -0,0 +1,98 @@
+import io
+import random
+
+import pytest
+
+from sgml_splitter import TAIL_SIZE, split_submission
+
+# Long enough that the body streams out in pieces around the TAIL_SIZE holdback
+PRIMARY = (b'<html><body><table>\n'
+           + b'<tr><td>Net revenue</td><td>1,234,567</td></tr>\n' * 20
+           + b'</table></body></html>')
+EXHIBIT = b'<html><body><p>Subsidiaries of the registrant</p></body></html>'
+PLAIN = b'ANNUAL REPORT PURSUANT TO SECTION 13 OR 15(d)\n\n  Item 1. Business'
+
+SUBMISSION = (
+    b'<SEC-DOCUMENT>0000320193-24-000123.txt\n'
+    b'<SEC-HEADER>0000320193-24-000123.hdr.sgml\n'
+    b'CONFORMED SUBMISSION TYPE:\t10-K\n'
+    b'</SEC-HEADER>\n'
+    b'<DOCUMENT>\n<TYPE>10-K\n<SEQUENCE>1\n<FILENAME>aapl-20240928.htm\n'
+    b'<DESCRIPTION>10-K\n<TEXT>\n<XBRL>\n' + PRIMARY + b'\n</XBRL>\n</TEXT>\n</DOCUMENT>\n'
+    b'<DOCUMENT>\n<TYPE>EX-21.1\n<SEQUENCE>2\n<FILENAME>ex211.htm\n'
+    b'<TEXT>\n' + EXHIBIT + b'\n</TEXT>\n</DOCUMENT>\n'
+    b'<DOCUMENT>\n<TYPE>GRAPHIC\n<SEQUENCE>3\n<FILENAME>logo.jpg\n'
+    b'<TEXT>\nbegin 644 logo.jpg\nM' + b'A' * 60 + b'\nend\n</TEXT>\n</DOCUMENT>\n'
+    b'<DOCUMENT>\n<TYPE>EX-99\n<SEQUENCE>4\n'
+    b'<TEXT>\n' + PLAIN + b'\n</TEXT>\n</DOCUMENT>\n'
+    b'</SEC-DOCUMENT>\n'
+)
+
+CHUNK_SIZES = [1, 2, 3, 7, TAIL_SIZE, TAIL_SIZE + 1, len(SUBMISSION)]
+
+
+class _Sink(io.BytesIO):
+    """BytesIO that keeps its contents after close"""
+
+    def close(self):
+        self.data = self.getvalue()
+        super().close()
+
+
+def _chunks(data, sizes):
+    i = 0
+    for size in sizes:
+        if i >= len(data):
+            return
+        yield data[i:i + size]
+        i += size
+    yield data[i:]
+
+
+def _split(data, sizes, skip=('GRAPHIC',)):
+    sinks = {}
+
+    def select(doc):
+        if doc['type'] in skip:
+            return None
+        sinks[doc['sequence']] = _Sink()
+        return sinks[doc['sequence']]
+
+    documents = split_submission(_chunks(data, sizes), select)
+    return documents, {seq: sink.data for seq, sink in sinks.items()}
+
+
+def _fixed(size):
+    return [size] * (len(SUBMISSION) // size + 1)
+
+
+@pytest.mark.parametrize('size', CHUNK_SIZES)
+def test_documents_are_identical_at_any_chunk_size(size):
+    documents, bodies = _split(SUBMISSION, _fixed(size))
+
+    assert [doc['type'] for doc in documents] == ['10-K', 'EX-21.1', 'GRAPHIC', 'EX-99']
+    assert documents[0]['filename'] == 'aapl-20240928.htm'
+    assert 'filename' not in documents[3]
+    # The <XBRL> wrapper is dropped and the skipped GRAPHIC is never written
+    assert bodies == {'1': PRIMARY, '2': EXHIBIT, '4': PLAIN}
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_documents_are_identical_at_random_chunk_sizes(seed):
+    rng = random.Random(seed)
+    sizes = [rng.randint(1, 2 * TAIL_SIZE) for _ in range(len(SUBMISSION))]
+
+    documents, bodies = _split(SUBMISSION, sizes)
+
+    assert len(documents) == 4
+    assert bodies == {'1': PRIMARY, '2': EXHIBIT, '4': PLAIN}
+
+
+@pytest.mark.parametrize('size', CHUNK_SIZES)
+def test_truncated_submission_keeps_what_was_received(size):
+    truncated = SUBMISSION[:SUBMISSION.index(PRIMARY) + 500]
+
+    documents, bodies = _split(truncated, _fixed(size))
+
+    assert [doc['type'] for doc in documents] == ['10-K']
+    assert bodies == {'1': PRIMARY[:500].rstrip()}
@@ -0,0 +1,168 @@
+import json
+import os
+import threading
+import time
+import logging
+
+from sec_client import SEC_WWW_URL, sec_get
+
+logger = logging.getLogger(__name__)
+
+TICKERS_URL = f'{SEC_WWW_URL}/files/company_tickers.json'
+
+# Compact on-disk copy so warm restarts skip the multi-megabyte download
+INDEX_PATH = os.path.join('/tmp', 'sec_ticker_index.json')
+INDEX_TTL = 24 * 60 * 60  # SEC regenerates the ticker file roughly daily
+
+
+class TickerIndex:
+    """In-memory ticker <-> CIK index backed by SEC's company_tickers.json"""
+
+    def __init__(self, path=INDEX_PATH, ttl=INDEX_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._cold_lock = threading.Lock()
+        self._refreshing = False
+        self._rows = []
+        self._by_ticker = {}
+        self._by_cik = {}
+        self._etag = None
+        self._last_modified = None
+        self._fetched_at = 0
+        self._load_from_disk()
+
+    def lookup_cik(self, ticker, email):
+        """Return the zero-padded CIK for a ticker, or None if unknown"""
+        self._ensure_fresh(email)
+        cik = self._by_ticker.get(ticker.upper())
+        return str(cik).zfill(10) if cik is not None else None
+
+    def lookup_ticker(self, cik, email):
+        """Return (ticker, company name) for a CIK, or None if unknown"""
+        self._ensure_fresh(email)
+        return self._by_cik.get(int(cik))
+
+    def refresh(self, email):
+        """Re-fetch the ticker file using a conditional GET"""
+        headers = {}
+        if self._etag:
+            headers['If-None-Match'] = self._etag
+        if self._last_modified:
+            headers['If-Modified-Since'] = self._last_modified
+
+        response = sec_get(TICKERS_URL, email, headers=headers)
+
+        if response.status_code == 304:
+            logger.info("Ticker index not modified")
+            with self._lock:
+                self._fetched_at = time.time()
+            self._save_to_disk()
+            return
+
+        if response.status_code != 200:
+            error_msg = f"Failed to get company tickers: {response.status_code} - {response.text}"
+            logger.error(error_msg)
+            raise Exception(error_msg)
+
+        rows = [
+            [entry['cik_str'], entry['ticker'], entry['title']]
+            for entry in response.json().values()
+        ]
+        with self._lock:
+            self._build(rows)
+            self._etag = response.headers.get('ETag')
+            self._last_modified = response.headers.get('Last-Modified')
+            self._fetched_at = time.time()
+        logger.info(f"Ticker index refreshed with {len(rows)} entries")
+        self._save_to_disk()
+
+    def _ensure_fresh(self, email):
+        # Cold start has nothing to serve, so block on the first fetch;
+        # afterwards stale data is served while a background refresh runs
+        if not self._by_ticker:
+            with self._cold_lock:
+                if not self._by_ticker:
+                    self.refresh(email)
+            return
+
+        if time.time() - self._fetched_at < self.ttl:
+            return
+
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        thread = threading.Thread(target=self._background_refresh, args=(email,), daemon=True)
+        thread.start()
+
+    def _background_refresh(self, email):
+        try:
+            self.refresh(email)
+        except Exception as e:
+            logger.error(f"Background ticker index refresh failed: {str(e)}")
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def _build(self, rows):
+        by_ticker = {}
+        by_cik = {}
+        for cik, ticker, title in rows:
+            by_ticker[ticker.upper()] = cik
+            # The SEC file lists a company's primary ticker first
+            by_cik.setdefault(cik, (ticker, title))
+        self._rows = rows
+        self._by_ticker = by_ticker
+        self._by_cik = by_cik
+
+    def _load_from_disk(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self._build(data['rows'])
+            self._etag = data.get('etag')
+            self._last_modified = data.get('last_modified')
+            self._fetched_at = data.get('fetched_at', 0)
+            logger.info(f"Loaded ticker index from {self.path}")
+        except FileNotFoundError:
+            pass
+        except (IOError, ValueError, KeyError) as e:
+            logger.error(f"Ignoring unreadable ticker index {self.path}: {str(e)}")
+
+    def _save_to_disk(self):
+        data = {
+            'etag': self._etag,
+            'last_modified': self._last_modified,
+            'fetched_at': self._fetched_at,
+            'rows': self._rows,
+        }
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, separators=(',', ':'))
+            os.replace(tmp_path, self.path)
+        except IOError as e:
+            logger.error(f"Failed to persist ticker index: {str(e)}")
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_ticker_index():
+    """Return the process-wide ticker index"""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = TickerIndex()
+        return _index
+
+
+def lookup_cik(ticker, email):
+    return get_ticker_index().lookup_cik(ticker, email)
+
+
+def lookup_ticker(cik, email):
+    return get_ticker_index().lookup_ticker(cik, email)